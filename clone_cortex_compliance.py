@@ -8,13 +8,31 @@ Usage:
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import sys
 import time
 import argparse
 import logging
 import uuid
-from typing import Optional, Dict, List, Any
+import re
+import os
+import hashlib
+from collections import Counter, defaultdict, deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, List, Any, Union
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    
+    _loads = json.loads
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -24,16 +42,72 @@ DEFAULT_API_KEY_ID = ""
 DEFAULT_FQDN = ""
 DEFAULT_STD_NAME = ""
 DEFAULT_PREFIX = "Clone - "
+CONTROL_WORKERS = 8
+RULE_WORKERS = 8
+PAGE_WORKERS = 4
+STANDARDS_PAGE_SIZE = 100
+POOL_SIZE = 32
+PROGRESS_FLUSH_EVERY = 10
+LINK_SETTLE_SECONDS = 2
+CATEGORY_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cortex_cloner")
+CATEGORY_CACHE_TTL = 24 * 60 * 60
+
+
+@lru_cache(maxsize=64)
+def _clean_severity(severity_code: str) -> str:
+    s = severity_code.lower()
+    if "critical" in s:
+        return "critical"
+    if "high" in s:
+        return "high"
+    if "medium" in s:
+        return "medium"
+    if "info" in s:
+        return "info"
+    return "low"
+
+
+_RULES_PAYLOAD_HEAD = b'{"request_data":{"control_id":'
+_RULES_PAYLOAD_MID = b',"rules":'
+_RULES_PAYLOAD_TAIL = b'}}'
+
+
+def _encode_rules_payload(control_id: str, clean_rules: List[Dict]) -> bytes:
+    return b"".join((_RULES_PAYLOAD_HEAD, _dumps(control_id), _RULES_PAYLOAD_MID, _dumps(clean_rules), _RULES_PAYLOAD_TAIL))
+
+
+def _norm_keys(d: Dict) -> Dict:
+    return {k.lower(): v for k, v in d.items()}
+
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def _tokenize(text: str) -> set:
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+def _poll(fn, timeout: float, interval: float, delay: float = 0) -> Any:
+    if delay:
+        time.sleep(delay)
+    deadline = time.monotonic() + timeout
+    while True:
+        result = fn()
+        if result or time.monotonic() >= deadline:
+            return result
+        time.sleep(interval)
 
 
 class CortexComplianceCloner:
     FALLBACK_CATEGORY = "Access Control"
     FALLBACK_SUBCATEGORY = "1.1"
     
-    def __init__(self, api_key: str, api_key_id: str, fqdn: str, prefix: str = "Clone - "):
+    def __init__(self, api_key: str, api_key_id: str, fqdn: str, prefix: str = "Clone - ", refresh_cache: bool = False):
         self.api_key = api_key
         self.api_key_id = api_key_id
         self.prefix = prefix
+        self._id_prefix = prefix.replace(' ', '_')
+        self.refresh_cache = refresh_cache
         
         if not fqdn.startswith("https://"):
             self.base_url = f"https://{fqdn}/public_api/v1/compliance"
@@ -44,18 +118,35 @@ class CortexComplianceCloner:
             "x-xdr-auth-id": api_key_id,
             "Authorization": api_key,
             "Content-Type": "application/json",
-            "Accept": "application/json"
+            "Accept": "application/json",
+            "Connection": "keep-alive"
         }
         
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=Retry(total=0))
+        self.session.mount("https://", adapter)
+        
+        tenant_key = hashlib.sha256(self.base_url.encode('utf-8')).hexdigest()[:16]
+        self.category_cache_path = os.path.join(CATEGORY_CACHE_DIR, f"{tenant_key}_categories.json")
+        
         self.valid_categories = []
         self.valid_subcategories = []
+        self._cat_set = set()
+        self._cat_lower = {}
+        self._cat_tokens = defaultdict(set)
+        self._cat_re = None
+        self._sub_set = set()
+        self._sub_lower = {}
         self.failed_controls = []
         self.failed_rules = []
+        self._progress = []
     
-    def post_request(self, endpoint: str, payload: Dict, timeout: int = 90) -> Optional[requests.Response]:
+    def post_request(self, endpoint: str, payload: Union[Dict, bytes], timeout: int = 90) -> Optional[requests.Response]:
         url = f"{self.base_url}/{endpoint}"
+        data = payload if isinstance(payload, bytes) else _dumps(payload)
         try:
-            response = requests.post(url, headers=self.headers, json=payload, timeout=timeout)
+            response = self.session.post(url, data=data, timeout=timeout)
             if response.status_code >= 400:
                 logger.debug(f"API error {response.status_code} from {endpoint}: {response.text}")
             return response
@@ -63,57 +154,108 @@ class CortexComplianceCloner:
             logger.debug(f"Connection error to {endpoint}: {e}")
             return None
     
-    def get_val(self, obj: Dict, key: str, default: Any = None) -> Any:
-        if not obj:
-            return default
-        if key in obj:
-            return obj[key]
-        if key.lower() in obj:
-            return obj[key.lower()]
-        if key.upper() in obj:
-            return obj[key.upper()]
-        return default
-    
     def clean_severity(self, severity_code: str) -> str:
         if not severity_code:
             return "low"
-        s = str(severity_code).lower()
-        if "critical" in s:
-            return "critical"
-        if "high" in s:
-            return "high"
-        if "medium" in s:
-            return "medium"
-        if "info" in s:
-            return "info"
-        return "low"
+        return _clean_severity(str(severity_code))
     
     def fetch_valid_categories(self) -> bool:
-        logger.info("Fetching valid categories and subcategories...")
-        response = self.post_request("get_control_categories_and_subcategories", {"request_data": {}})
-        if response and response.status_code == 200:
-            reply = response.json().get('reply', {})
-            data = reply.get('data', {})
-            self.valid_categories = data.get('categories', [])
-            self.valid_subcategories = data.get('subcategories', [])
-            logger.info(f"Found {len(self.valid_categories)} categories and {len(self.valid_subcategories)} subcategories")
-            return True
-        return False
+        data = None if self.refresh_cache else self.load_cached_categories()
+        if data is not None:
+            logger.info("Using cached categories and subcategories")
+        else:
+            logger.info("Fetching valid categories and subcategories...")
+            response = self.post_request("get_control_categories_and_subcategories", {"request_data": {}})
+            if not response or response.status_code != 200:
+                return False
+            data = _loads(response.content).get('reply', {}).get('data', {})
+            self.save_cached_categories(data)
+        
+        self.valid_categories = data.get('categories', [])
+        self.valid_subcategories = data.get('subcategories', [])
+        self.build_category_index()
+        logger.info(f"Found {len(self.valid_categories)} categories and {len(self.valid_subcategories)} subcategories")
+        return True
+    
+    def load_cached_categories(self) -> Optional[Dict]:
+        try:
+            with open(self.category_cache_path, 'rb') as f:
+                cached = _loads(f.read())
+        except (OSError, ValueError):
+            return None
+        
+        if not isinstance(cached, dict):
+            return None
+        ts = cached.get('ts')
+        if not isinstance(ts, (int, float)) or not 0 <= time.time() - ts < CATEGORY_CACHE_TTL:
+            return None
+        data = cached.get('data')
+        if not isinstance(data, dict) or not data.get('categories'):
+            return None
+        return data
+    
+    def save_cached_categories(self, data: Dict):
+        if not data.get('categories'):
+            return
+        try:
+            os.makedirs(CATEGORY_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{self.category_cache_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(_dumps({"ts": time.time(), "data": data}))
+            os.replace(tmp_path, self.category_cache_path)
+        except OSError as e:
+            logger.debug(f"Could not write categories cache: {e}")
+    
+    def build_category_index(self):
+        self._cat_set = set(self.valid_categories)
+        self._cat_lower = {}
+        for cat in self.valid_categories:
+            self._cat_lower.setdefault(cat.lower(), cat)
+        self._cat_tokens = defaultdict(set)
+        for cat in self.valid_categories:
+            for token in _tokenize(cat):
+                self._cat_tokens[token].add(cat)
+        self._cat_re = None
+        if self.valid_categories:
+            alternatives = sorted(self._cat_lower, key=len, reverse=True)
+            self._cat_re = re.compile("|".join(re.escape(cat) for cat in alternatives), re.IGNORECASE)
+        self._sub_set = set(self.valid_subcategories)
+        self._sub_lower = {}
+        for sub in self.valid_subcategories:
+            self._sub_lower.setdefault(sub.lower(), sub)
     
     def find_closest_category(self, original_category: str) -> str:
         if not original_category:
             return self.FALLBACK_CATEGORY
         
-        if original_category in self.valid_categories:
+        if original_category in self._cat_set:
             return original_category
         
         orig_lower = original_category.lower()
-        for cat in self.valid_categories:
-            if cat.lower() == orig_lower:
-                return cat
-            if orig_lower in cat.lower() or cat.lower() in orig_lower:
+        exact = self._cat_lower.get(orig_lower)
+        if exact:
+            return exact
+        
+        if self._cat_re:
+            match = self._cat_re.search(original_category)
+            if match and match.group(0).lower() in self._cat_lower:
+                return self._cat_lower[match.group(0).lower()]
+        
+        for cat_lower, cat in self._cat_lower.items():
+            if orig_lower in cat_lower:
                 return cat
         
+        query_tokens = _tokenize(original_category)
+        scores = Counter()
+        for token in query_tokens:
+            for cat in self._cat_tokens.get(token, ()):
+                scores[cat] += 1
+        if scores:
+            best = min(scores, key=lambda cat: (-scores[cat], len(cat), cat))
+            if scores[best] >= 2 or scores[best] * 2 > len(query_tokens):
+                logger.warning(f"Category '{original_category}' not found, using closest match by shared words: {best}")
+                return best
+        
         logger.warning(f"Category '{original_category}' not found, using fallback: {self.FALLBACK_CATEGORY}")
         return self.FALLBACK_CATEGORY
     
@@ -121,14 +263,10 @@ class CortexComplianceCloner:
         if not original_subcategory:
             return None
         
-        if original_subcategory in self.valid_subcategories:
+        if original_subcategory in self._sub_set:
             return original_subcategory
         
-        for sub in self.valid_subcategories:
-            if sub.lower() == original_subcategory.lower():
-                return sub
-        
-        return None
+        return self._sub_lower.get(original_subcategory.lower())
     
     def find_standard_by_name(self, standard_name: str) -> Optional[Dict]:
         logger.info(f"Searching for standard: {standard_name}")
@@ -140,36 +278,50 @@ class CortexComplianceCloner:
         })
         
         if response and response.status_code == 200:
-            reply = response.json().get('reply', {})
+            reply = _loads(response.content).get('reply', {})
             standards = reply.get('standards') or reply.get('data', [])
             if standards:
                 return standards[0]
         
         logger.info("Filter didn't work, scanning pages...")
-        search_from = 0
-        while True:
-            response = self.post_request("get_standards", {
-                "request_data": {
-                    "search_from": search_from,
-                    "search_to": search_from + 100
-                }
-            })
-            
-            if not response or response.status_code != 200:
-                break
-            
-            page_data = response.json().get('reply', {}).get('standards', [])
-            if not page_data:
-                break
-            
-            for std in page_data:
-                if std.get('name') == standard_name:
-                    return std
+        executor = ThreadPoolExecutor(max_workers=PAGE_WORKERS)
+        pending = deque()
+        try:
+            next_from = 0
+            for _ in range(PAGE_WORKERS):
+                pending.append(executor.submit(self.fetch_standards_page, next_from))
+                next_from += STANDARDS_PAGE_SIZE
             
-            search_from += 100
+            while pending:
+                page_data = pending.popleft().result()
+                if not page_data:
+                    break
+                
+                for std in page_data:
+                    if std.get('name') == standard_name:
+                        return std
+                
+                pending.append(executor.submit(self.fetch_standards_page, next_from))
+                next_from += STANDARDS_PAGE_SIZE
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
         
         return None
     
+    def fetch_standards_page(self, search_from: int) -> Optional[List[Dict]]:
+        response = self.post_request("get_standards", {
+            "request_data": {
+                "search_from": search_from,
+                "search_to": search_from + STANDARDS_PAGE_SIZE
+            }
+        })
+        
+        if not response or response.status_code != 200:
+            return None
+        return _loads(response.content).get('reply', {}).get('standards', [])
+    
     def check_standard_exists(self, standard_name: str) -> Optional[str]:
         response = self.post_request("get_standards", {
             "request_data": {
@@ -178,7 +330,7 @@ class CortexComplianceCloner:
         })
         
         if response and response.status_code == 200:
-            standards = response.json().get('reply', {}).get('standards', [])
+            standards = _loads(response.content).get('reply', {}).get('standards', [])
             if standards:
                 return standards[0].get('id')
         return None
@@ -199,9 +351,7 @@ class CortexComplianceCloner:
         
         if response and response.status_code == 200:
             logger.info("Standard created successfully")
-            time.sleep(2)
-            
-            new_id = self.check_standard_exists(name)
+            new_id = _poll(lambda: self.check_standard_exists(name), timeout=10, interval=0.25)
             if new_id:
                 return new_id
             else:
@@ -216,46 +366,48 @@ class CortexComplianceCloner:
         response = self.post_request("get_control", {"request_data": {"id": control_id}})
         
         if response and response.status_code == 200:
-            reply = response.json().get('reply', {})
+            reply = _loads(response.content).get('reply', {})
             controls = reply.get('control', [])
             if controls and len(controls) > 0:
-                return controls[0]
+                return _norm_keys(controls[0])
         return None
     
     def sanitize_rules(self, rule_list: List[Dict]) -> List[Dict]:
         clean_rules = []
+        id_prefix = self._id_prefix
         
         for rule in rule_list:
             try:
-                name = self.get_val(rule, 'name')
-                logical_id = self.get_val(rule, 'logical_id')
+                rule = _norm_keys(rule)
+                name = rule.get('name')
+                logical_id = rule.get('logical_id')
                 
                 if not name or not logical_id:
                     logger.debug(f"Skipping rule without name or logical_id: {rule}")
                     continue
                 
-                raw_severity = self.get_val(rule, 'severity')
+                raw_severity = rule.get('severity')
                 clean_severity = self.clean_severity(raw_severity)
                 
-                remediation = self.get_val(rule, 'remediation_steps') or self.get_val(rule, 'mitigation') or ""
+                remediation = rule.get('remediation_steps') or rule.get('mitigation') or ""
                 
-                original_type = self.get_val(rule, 'type') or "Identity"
+                original_type = rule.get('type') or "Identity"
                 if original_type != "Identity":
                     logger.warning(f"Rule type '{original_type}' not supported by API, using 'Identity' for rule: {name[:50]}")
                 
-                unique_logical_id = f"{self.prefix.replace(' ', '_')}{logical_id}"[:100]
+                unique_logical_id = f"{id_prefix}{logical_id}"[:100]
                 
                 clean_rule = {
                     "name": name[:200],
-                    "description": (self.get_val(rule, 'description') or "")[:2000],
+                    "description": (rule.get('description') or "")[:2000],
                     "type": "Identity",
                     "logical_id": unique_logical_id,
                     "severity": clean_severity,
                     "scannable_assets": [],
                     "remediation_steps": remediation[:2000],
-                    "generate_findings": bool(self.get_val(rule, 'generate_findings', True)),
-                    "generate_issues": bool(self.get_val(rule, 'generate_issues', True)),
-                    "generate_scan_logs": bool(self.get_val(rule, 'generate_scan_logs', True))
+                    "generate_findings": bool(rule.get('generate_findings', True)),
+                    "generate_issues": bool(rule.get('generate_issues', True)),
+                    "generate_scan_logs": bool(rule.get('generate_scan_logs', True))
                 }
                 
                 logger.debug(f"Sanitized rule: {clean_rule['name']}")
@@ -300,30 +452,54 @@ class CortexComplianceCloner:
             return None
             
         if response.status_code == 200:
-            reply = response.json().get('reply', {})
+            reply = _loads(response.content).get('reply', {})
             control_id = reply.get('control_id')
             
             if control_id:
                 return control_id
             
-            for attempt in range(3):
-                time.sleep(1.5)
-                search_response = self.post_request("get_controls", {
-                    "request_data": {
-                        "filters": [{"field": "name", "operator": "eq", "value": name[:200]}]
-                    }
-                })
-                
-                if search_response and search_response.status_code == 200:
-                    controls = search_response.json().get('reply', {}).get('controls', [])
-                    if controls:
-                        return controls[0].get('id')
-            
-            return None
+            return _poll(lambda: self.find_control_id_by_name(name[:200]), timeout=3, interval=1.5, delay=1.5)
         else:
             logger.warning(f"Failed to create control '{name}' (HTTP {response.status_code}): {response.text}")
             return None
     
+    def clone_control(self, old_control_id: str, source_control: Optional[Dict]) -> tuple:
+        if not source_control:
+            return (f"id {old_control_id}", "SKIP (fetch failed)", None)
+        
+        original_name = source_control.get('control_name') or source_control.get('name') or f"Control_{old_control_id}"
+        new_control_name = f"{self.prefix}{original_name}"[:200]
+        
+        new_control_id = self.create_control(
+            name=new_control_name,
+            category=source_control.get('category') or "Access Control",
+            description=source_control.get('description') or "",
+            subcategory=source_control.get('subcategory'),
+            severity=source_control.get('severity')
+        )
+        
+        if not new_control_id:
+            return (original_name, "FAILED", None)
+        
+        return (original_name, "OK", {
+            "control_id": new_control_id,
+            "control_name": new_control_name,
+            "rules": source_control.get('compliance_rules') or []
+        })
+    
+    def find_control_id_by_name(self, name: str) -> Optional[str]:
+        response = self.post_request("get_controls", {
+            "request_data": {
+                "filters": [{"field": "name", "operator": "eq", "value": name}]
+            }
+        })
+        
+        if response and response.status_code == 200:
+            controls = _loads(response.content).get('reply', {}).get('controls', [])
+            if controls:
+                return controls[0].get('id')
+        return None
+    
     def add_rules_to_control(self, control_id: str, control_name: str, rules: List[Dict], max_retries: int = 3) -> tuple:
         if not rules:
             return (0, 0)
@@ -333,14 +509,10 @@ class CortexComplianceCloner:
             logger.debug("No valid rules to add after sanitization")
             return (0, len(rules))
         
+        payload = _encode_rules_payload(control_id, clean_rules)
         response = None
         for attempt in range(max_retries):
-            response = self.post_request("add_rules_to_control", {
-                "request_data": {
-                    "control_id": control_id,
-                    "rules": clean_rules
-                }
-            })
+            response = self.post_request("add_rules_to_control", payload)
             
             if response and response.status_code == 200:
                 return (len(clean_rules), 0)
@@ -360,20 +532,23 @@ class CortexComplianceCloner:
         })
         return (0, len(clean_rules))
     
-    def link_controls_to_standard(self, standard_id: str, control_ids: List[str]) -> bool:
-        response = self.post_request("get_standards", {
-            "request_data": {
-                "filters": [{"field": "id", "operator": "eq", "value": standard_id}]
-            }
-        })
-        
-        existing_controls = []
-        if response and response.status_code == 200:
-            standards = response.json().get('reply', {}).get('standards', [])
-            if standards:
-                existing_controls = standards[0].get('controls_ids') or []
-        
-        combined_controls = list(set(existing_controls + control_ids))
+    def link_controls_to_standard(self, standard_id: str, control_ids: List[str], is_new: bool = False) -> bool:
+        if is_new:
+            combined_controls = list(dict.fromkeys(control_ids))
+        else:
+            response = self.post_request("get_standards", {
+                "request_data": {
+                    "filters": [{"field": "id", "operator": "eq", "value": standard_id}]
+                }
+            })
+            
+            existing_controls = []
+            if response and response.status_code == 200:
+                standards = _loads(response.content).get('reply', {}).get('standards', [])
+                if standards:
+                    existing_controls = standards[0].get('controls_ids') or []
+            
+            combined_controls = list(dict.fromkeys(existing_controls + control_ids))
         
         response = self.post_request("edit_standard", {
             "request_data": {
@@ -389,6 +564,17 @@ class CortexComplianceCloner:
             logger.error(f"Failed to link controls: {error_msg}")
             return False
     
+    def report_progress(self, line: str):
+        self._progress.append(line)
+        if len(self._progress) >= PROGRESS_FLUSH_EVERY:
+            self.flush_progress()
+    
+    def flush_progress(self):
+        if self._progress:
+            sys.stdout.write("\n".join(self._progress) + "\n")
+            sys.stdout.flush()
+            self._progress = []
+    
     def clone_standard(self, source_standard_name: str) -> bool:
         print(f"\n{'='*60}")
         print("CORTEX COMPLIANCE CLONER")
@@ -397,8 +583,6 @@ class CortexComplianceCloner:
         print(f"Target Prefix: {self.prefix}")
         print(f"{'='*60}\n")
         
-        self.fetch_valid_categories()
-        
         print("[STEP 1] Finding source standard...")
         source_standard = self.find_standard_by_name(source_standard_name)
         
@@ -414,6 +598,7 @@ class CortexComplianceCloner:
         print(f"\n[STEP 2] Creating/Finding target standard: {new_standard_name}")
         
         existing_id = self.check_standard_exists(new_standard_name)
+        is_new_standard = not existing_id
         if existing_id:
             new_standard_id = existing_id
             print(f"Target standard already exists. ID: {new_standard_id}")
@@ -430,55 +615,36 @@ class CortexComplianceCloner:
             print(f"Created new standard. ID: {new_standard_id}")
         
         print(f"\n[STEP 3] Creating {len(control_ids)} controls...")
+        if control_ids:
+            self.fetch_valid_categories()
         new_control_ids = []
         rules_stats = {"total": 0, "success": 0, "failed": 0}
         pending_rules = []
         
-        for i, old_control_id in enumerate(control_ids, 1):
-            print(f"  [{i}/{len(control_ids)}] Creating control...", end=" ", flush=True)
-            
-            source_control = self.get_control_details(old_control_id)
-            if not source_control:
-                print("SKIP (fetch failed)")
+        cloned_controls = [None] * len(control_ids)
+        if control_ids:
+            with ThreadPoolExecutor(max_workers=min(CONTROL_WORKERS, len(control_ids))) as executor:
+                futures = {executor.submit(self.get_control_details, cid): idx for idx, cid in enumerate(control_ids)}
+                for i, future in enumerate(as_completed(futures), 1):
+                    idx = futures[future]
+                    label, status, cloned = self.clone_control(control_ids[idx], future.result())
+                    cloned_controls[idx] = cloned
+                    if cloned and cloned["rules"]:
+                        status = f"OK ({len(cloned['rules'])} rules pending)"
+                    self.report_progress(f"  [{i}/{len(control_ids)}] Creating control {label[:30]}... {status}")
+            self.flush_progress()
+        
+        for cloned in cloned_controls:
+            if not cloned:
                 continue
-            
-            original_name = self.get_val(source_control, 'control_name') or self.get_val(source_control, 'name') or f"Control_{old_control_id}"
-            new_control_name = f"{self.prefix}{original_name}"[:200]
-            
-            category = self.get_val(source_control, 'category') or "Access Control"
-            subcategory = self.get_val(source_control, 'subcategory')
-            description = self.get_val(source_control, 'description') or ""
-            severity = self.get_val(source_control, 'severity')
-            
-            new_control_id = self.create_control(
-                name=new_control_name,
-                category=category,
-                description=description,
-                subcategory=subcategory,
-                severity=severity
-            )
-            
-            if not new_control_id:
-                print("FAILED")
-                continue
-            
-            new_control_ids.append(new_control_id)
-            
-            raw_rules = self.get_val(source_control, 'compliance_rules') or []
-            if raw_rules:
-                pending_rules.append({
-                    "control_id": new_control_id,
-                    "control_name": new_control_name,
-                    "rules": raw_rules
-                })
-                rules_stats["total"] += len(raw_rules)
-                print(f"OK ({len(raw_rules)} rules pending)", flush=True)
-            else:
-                print("OK", flush=True)
+            new_control_ids.append(cloned["control_id"])
+            if cloned["rules"]:
+                pending_rules.append(cloned)
+                rules_stats["total"] += len(cloned["rules"])
         
         print(f"\n[STEP 4] Linking {len(new_control_ids)} controls to standard...")
         if new_control_ids:
-            if self.link_controls_to_standard(new_standard_id, new_control_ids):
+            if self.link_controls_to_standard(new_standard_id, new_control_ids, is_new=is_new_standard):
                 print("SUCCESS: Controls linked to standard")
             else:
                 print("WARNING: Failed to link some controls")
@@ -487,17 +653,20 @@ class CortexComplianceCloner:
         
         if pending_rules:
             print(f"\n[STEP 5] Adding rules to {len(pending_rules)} controls...")
-            time.sleep(2)
-            for i, pr in enumerate(pending_rules, 1):
-                print(f"  [{i}/{len(pending_rules)}] Adding {len(pr['rules'])} rules to {pr['control_name'][:30]}...", end=" ", flush=True)
-                success_count, fail_count = self.add_rules_to_control(pr['control_id'], pr['control_name'], pr['rules'])
-                rules_stats["success"] += success_count
-                rules_stats["failed"] += fail_count
-                if success_count > 0:
-                    print(f"OK [+{success_count}]", flush=True)
-                else:
-                    print(f"FAILED", flush=True)
-                time.sleep(2)
+            time.sleep(LINK_SETTLE_SECONDS)
+            with ThreadPoolExecutor(max_workers=min(RULE_WORKERS, len(pending_rules))) as executor:
+                futures = {
+                    executor.submit(self.add_rules_to_control, pr['control_id'], pr['control_name'], pr['rules']): pr
+                    for pr in pending_rules
+                }
+                for i, future in enumerate(as_completed(futures), 1):
+                    pr = futures[future]
+                    success_count, fail_count = future.result()
+                    rules_stats["success"] += success_count
+                    rules_stats["failed"] += fail_count
+                    status = f"OK [+{success_count}]" if success_count > 0 else "FAILED"
+                    self.report_progress(f"  [{i}/{len(pending_rules)}] Adding {len(pr['rules'])} rules to {pr['control_name'][:30]}... {status}")
+            self.flush_progress()
         
         print(f"\n{'='*60}")
         print("CLONE SUMMARY")
@@ -536,6 +705,7 @@ Examples:
     parser.add_argument("--standard", default=DEFAULT_STD_NAME, help="Name of the standard to clone")
     parser.add_argument("--prefix", default=DEFAULT_PREFIX, help="Prefix for cloned items (default: 'Clone - ')")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument("--refresh-cache", action="store_true", help="Ignore the cached category list and fetch it from the API")
     
     return parser.parse_args()
 
@@ -560,7 +730,8 @@ def main():
         api_key=args.key,
         api_key_id=args.id,
         fqdn=args.tenant,
-        prefix=args.prefix
+        prefix=args.prefix,
+        refresh_cache=args.refresh_cache
     )
     
     success = cloner.clone_standard(args.standard)